@@ -1,7 +1,25 @@
 import json
 import os
+import re
 import requests
+from itertools import islice
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shared session: keeps the connection to nitter warm across calls
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+))
 
 class SimpleTwitterScraper:
     """
@@ -9,9 +27,11 @@ class SimpleTwitterScraper:
     Does not require Twitter login or cookies.
     """
 
+    # tweet text = first <p> block after each tweet-body marker
+    _TWEET_RE = re.compile(r'<div class="tweet-body">.*?<p(?:\s[^>]*)?>(.*?)</p>', re.DOTALL)
+
     def __init__(self):
         self.base_url = "https://nitter.net/search?f=tweets&q={query}"
-        self.headers = {"User-Agent": "Mozilla/5.0"}
 
     def search(self, query, limit=20):
         """Fetch tweets by HTML parsing via Nitter."""
@@ -19,41 +39,33 @@ class SimpleTwitterScraper:
         print(f"[SimpleScraper] Fetching: {url}")
 
         try:
-            resp = requests.get(url, headers=self.headers, timeout=10)
+            resp = _SESSION.get(url, timeout=10)
             if resp.status_code != 200:
                 print("[SimpleScraper] Failed request:", resp.status_code)
                 return []
 
-            return self._parse_nitter_html(resp.text)[:limit]
+            return self._parse_nitter_html(resp.text, limit)
 
         except Exception as e:
             print("[SimpleScraper] Error:", e)
             return []
 
-    def _parse_nitter_html(self, html):
-        """Extract tweet text from Nitter HTML."""
-        tweets = []
-        parts = html.split('<div class="tweet-body">')
-
-        for p in parts[1:]:
-            start = p.find("<p>")
-            end = p.find("</p>")
-            if start != -1 and end != -1:
-                content = p[start + 3:end]
-                tweets.append(content)
-
-        return tweets
+    def _parse_nitter_html(self, html, limit=None):
+        """Extract tweet text from Nitter HTML; stops scanning after `limit` hits."""
+        matches = islice(self._TWEET_RE.finditer(html), limit)
+        return [m.group(1) for m in matches]
 
     def save(self, tweets, path="data/raw/simple_scrape.json"):
         """Save tweets to JSON file."""
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(
-                {"timestamp": datetime.utcnow().isoformat(), "tweets": tweets},
-                f,
-                indent=4
-            )
+        payload = {"timestamp": datetime.utcnow().isoformat(), "tweets": tweets}
+        if orjson is not None:
+            with open(path, "wb") as f:
+                f.write(orjson.dumps(payload))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
 
         print(f"[SimpleScraper] Saved data → {path}")
 
@@ -8,14 +8,22 @@ Twikit + HTML hybrid scraper (safe defaults + HTML fallback)
 """
 
 import asyncio
+import atexit
+import functools
+import inspect
+import io
+import itertools
 import random
+import re
 import time
 import os
-from typing import List, Dict, Optional, Any
+from html import unescape
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
 # third-party (install in Colab if missing):
-# pip install twikit httpx beautifulsoup4
+# pip install twikit httpx[http2] beautifulsoup4 lxml selectolax
 try:
     from twikit import Client
 except Exception:
@@ -23,6 +31,7 @@ except Exception:
 
 import httpx
 from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -33,14 +42,35 @@ GLOBAL_QPS = float(os.getenv("SG_QPS", "1.0"))   # requests per second global
 PER_ACCOUNT_CONCURRENCY = int(os.getenv("SG_ACC_CONC", "2"))
 REQUEST_TIMEOUT = int(os.getenv("SG_TIMEOUT", "15"))
 MAX_RETRIES = int(os.getenv("SG_RETRIES", "3"))
-JITTER_LOW = 0.2
-JITTER_HIGH = 1.0
+HTTP_MAX_KEEPALIVE = int(os.getenv("SG_HTTP_KEEPALIVE", "64"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("SG_HTTP_MAX_CONN", "128"))
+HTTP_KEEPALIVE_EXPIRY = 30.0
+HEDGE_DELAY = 0.5  # seconds before the hedged HTML request in tweet_details(enable_hedge=True)
+MAX_HTML_BYTES = int(os.getenv("SG_MAX_HTML", "512000"))  # cap on decoded HTML read per page
+HOST_CONCURRENCY = int(os.getenv("SG_HOST_CONC", "64"))  # max in-flight requests to x.com
+RETRY_BACKOFF_CAP = 30.0
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+USER_ID_TTL = 6 * 3600          # cache username -> numeric id for 6h
+USER_ID_NEG_TTL = 10 * 60       # cache failed lookups for 10min
+USER_ID_CACHE_SIZE = 4096       # LRU bound on cached handles
 USER_AGENT_LIST = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118 Safari/537.36",
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16 Safari/605.1.15"
 ]
 
+# regex fast-path for search/timeline pages (see parse_articles_html)
+_ARTICLE_RE = re.compile(r'<article\b[^>]*>(.*?)</article>', re.DOTALL)
+_TEXT_RE = re.compile(r'data-testid="tweetText"[^>]*>(.*?)</div>', re.DOTALL)
+_ID_RE = re.compile(r'href="(/[^/"]+/status/(\d+))')
+_TAG_RE = re.compile(r"<[^>]+>")
+# selectors for the parser path; the link selector matches the status permalink
+# directly instead of the first <a> (usually the author's profile link)
+_TWEET_TEXT_SEL = 'div[data-testid="tweetText"]'
+_STATUS_LINK_SEL = 'a[href*="/status/"]'
+_STATUS_ID_RE = re.compile(r"/status/(\d+)")
+_USER_ID_RE = re.compile(r'profile_user_id["\']?\s*:\s*["\']?(\d+)')
+
 # ---------- ACCOUNT / POOL ----------
 @dataclass
 class Account:
@@ -60,25 +90,61 @@ class AccountPool:
         self.accounts = accounts
         self._lock = asyncio.Lock()
         self._idx = 0
+        self._atexit_registered = False
 
     async def init_clients(self):
+        """
+        Build every account's Twikit client once; they live for the process lifetime.
+        Client setup is synchronous (no network), so a plain loop is all that's needed.
+        """
         for acc in self.accounts:
-            if Client is not None:
+            self._init_one(acc)
+        if not self._atexit_registered:
+            atexit.register(self._close_at_exit)
+            self._atexit_registered = True
+
+    def _init_one(self, acc: Account):
+        if Client is None:
+            acc.client = None
+            return
+        try:
+            acc.client = Client("en-US")
+            # twikit expects a plain cookie dict
+            acc.client.set_cookies({"auth_token": acc.auth_token, "ct0": acc.ct0})
+            if acc.proxy:
+                # if twikit exposes set_proxy; guard with try-except
                 try:
-                    acc.client = Client("en-US")
-                    # twikit expects a plain cookie dict
-                    acc.client.set_cookies({"auth_token": acc.auth_token, "ct0": acc.ct0})
-                    if acc.proxy:
-                        # if twikit exposes set_proxy; guard with try-except
-                        try:
-                            acc.client.set_proxy(acc.proxy)
-                        except Exception:
-                            logger.debug(f"Proxy method not available for twikit client (acc={acc.name})")
-                except Exception as e:
-                    logger.warning(f"Failed to init twikit client for {acc.name}: {e}")
-                    acc.client = None
-            else:
-                acc.client = None
+                    acc.client.set_proxy(acc.proxy)
+                except Exception:
+                    logger.debug(f"Proxy method not available for twikit client (acc={acc.name})")
+        except Exception as e:
+            logger.warning(f"Failed to init twikit client for {acc.name}: {e}")
+            acc.client = None
+
+    async def close(self):
+        """Close every client's underlying HTTP session (whichever close hook twikit exposes)."""
+        for acc in self.accounts:
+            client = acc.client
+            if client is None:
+                continue
+            closer = (getattr(client, "aclose", None) or getattr(client, "close", None)
+                      or getattr(getattr(client, "http", None), "aclose", None))
+            try:
+                if closer is not None:
+                    res = closer()
+                    if inspect.isawaitable(res):
+                        await res
+            except Exception as e:
+                logger.debug(f"Failed to close twikit client for {acc.name}: {e}")
+            acc.client = None
+
+    def _close_at_exit(self):
+        if not any(acc.client for acc in self.accounts):
+            return
+        try:
+            asyncio.run(self.close())
+        except Exception:
+            pass
 
     async def get_account(self) -> Account:
         async with self._lock:
@@ -88,33 +154,64 @@ class AccountPool:
 
 # ---------- RATE LIMITER ----------
 class GlobalRateLimiter:
-    def __init__(self, qps: float):
+    """
+    Async token bucket: refills `qps` tokens per second up to `capacity`,
+    so short bursts go through immediately. The lock is only held while
+    updating the bucket, never across a sleep.
+    """
+    def __init__(self, qps: float, capacity: Optional[float] = None):
         if qps <= 0:
             qps = 1.0
-        self.min_delay = 1.0 / qps
+        self.qps = qps
+        self.capacity = max(1.0, capacity if capacity is not None else 2 * qps)
+        self.tokens = self.capacity
         self._lock = asyncio.Lock()
-        self._last = 0.0
+        self._last_refill: Optional[float] = None  # event-loop (monotonic) time, set on first wait
 
     async def wait(self):
-        async with self._lock:
-            now = time.time()
-            elapsed = now - self._last
-            to_wait = max(0.0, self.min_delay - elapsed)
-            if to_wait > 0:
-                await asyncio.sleep(to_wait + random.uniform(JITTER_LOW, JITTER_HIGH))
-            self._last = time.time()
+        while True:
+            async with self._lock:
+                now = asyncio.get_running_loop().time()
+                if self._last_refill is None:
+                    self._last_refill = now
+                self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.qps)
+                self._last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                deficit = (1 - self.tokens) / self.qps
+            await asyncio.sleep(deficit)
 
 # ---------- UTILITIES ----------
-def retryable(max_retries: int = MAX_RETRIES):
+class TransientHTTPError(Exception):
+    """Raised for retry-worthy HTTP statuses (429 / 5xx) so `retryable` retries them."""
+    def __init__(self, status_code: int, url: str = ""):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+
+def _raise_for_transient(r: httpx.Response):
+    if r.status_code in TRANSIENT_STATUS:
+        raise TransientHTTPError(r.status_code, str(r.url))
+
+def retryable(max_retries: int = MAX_RETRIES, exceptions: tuple = (httpx.HTTPError, TransientHTTPError)):
+    """
+    Retry only on `exceptions`, with capped exponential backoff and full jitter.
+    Programming errors (ValueError/TypeError) and anything else propagate immediately.
+    """
     def deco(fn):
+        @functools.wraps(fn)
         async def wrapper(*args, **kwargs):
             exc = None
             for i in range(max_retries):
                 try:
                     return await fn(*args, **kwargs)
-                except Exception as e:
+                except (ValueError, TypeError):
+                    raise
+                except exceptions as e:
                     exc = e
-                    backoff = (2 ** i) + random.random()
+                    if i + 1 >= max_retries:
+                        break
+                    backoff = random.uniform(0, min(RETRY_BACKOFF_CAP, 2 ** i))
                     logger.debug(f"Retry {i+1}/{max_retries} for {fn.__name__} after error: {e}; sleeping {backoff:.1f}s")
                     await asyncio.sleep(backoff)
             logger.error(f"Operation {fn.__name__} failed after {max_retries} attempts: {exc}")
@@ -122,19 +219,65 @@ def retryable(max_retries: int = MAX_RETRIES):
         return wrapper
     return deco
 
-def _choose_ua():
-    return random.choice(USER_AGENT_LIST)
+# one prebuilt header dict per UA, rotated round-robin (treat as read-only;
+# merge with {**headers, ...} when extra headers are needed)
+_UA_HEADERS = [{"User-Agent": ua} for ua in USER_AGENT_LIST]
+_ua_cycle = itertools.cycle(_UA_HEADERS)
+
+def _ua_headers() -> Dict[str, str]:
+    return next(_ua_cycle)
+
+# ---------- SHARED HTTP CLIENT ----------
+# one pooled client and one x.com concurrency cap per event loop: httpx clients
+# and asyncio semaphores are bound to the loop that first used them, so a later
+# asyncio.run() must get its own
+_http_state: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+
+def _loop_http_state() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    for dead in [l for l in _http_state if l.is_closed()]:
+        del _http_state[dead]  # its loop is gone, so the client can't be aclose()d; let GC have it
+    state = _http_state.get(loop)
+    if state is None or state[0].is_closed:
+        limits = httpx.Limits(max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                              max_connections=HTTP_MAX_CONNECTIONS,
+                              keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+        # limits/http2 must live on the transport when one is passed explicitly
+        transport = httpx.AsyncHTTPTransport(retries=0, http2=True, limits=limits)
+        client = httpx.AsyncClient(http2=True, timeout=REQUEST_TIMEOUT, limits=limits,
+                                   transport=transport, headers=_ua_headers())
+        # a recreated client keeps the loop's semaphore: requests may still be queued on it
+        sem = state[1] if state else asyncio.Semaphore(HOST_CONCURRENCY)
+        state = _http_state[loop] = (client, sem)
+    return state
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Pooled HTTP/2 client shared by every SafeScraper on the running loop so
+    TCP/TLS connections to x.com stay warm across scrapers and calls.
+    """
+    return _loop_http_state()[0]
+
+def _host_semaphore() -> asyncio.Semaphore:
+    """Cap on in-flight requests to x.com, shared by every SafeScraper on the running loop."""
+    return _loop_http_state()[1]
 
-def _quote_q(q: str):
-    return httpx.utils.quote(q, safe='')
+async def close_http_client():
+    """Shutdown hook: close the running loop's shared client (the next request recreates it)."""
+    state = _http_state.get(asyncio.get_running_loop())
+    if state is not None:
+        await state[0].aclose()
 
 # ---------- HTML PARSING FALLBACK ----------
-def parse_tweet_html(html: str) -> Dict:
-    soup = BeautifulSoup(html, "html.parser")
-    # Return minimal safe fields + raw snippet
+def parse_tweet_html(html: str, include_raw: bool = False, soup: Optional[BeautifulSoup] = None) -> Dict:
+    """Parse a tweet page; pass `soup` to reuse an already-built document."""
+    if soup is None:
+        soup = BeautifulSoup(html, "lxml")
+    # Return minimal safe fields (+ raw snippet only when asked for)
     data = {"id": None, "text": None, "username": None, "created_at": None,
             "likes": None, "retweets": None, "replies": None, "media": [], "raw_html": None}
-    data["raw_html"] = html[:4000]
+    if include_raw:
+        data["raw_html"] = html[:4000]
 
     # Prefer meta tags (og:description often contains tweet text snippet)
     og_desc = soup.find("meta", {"property": "og:description"})
@@ -170,12 +313,109 @@ def parse_tweet_html(html: str) -> Dict:
 
     return data
 
+def _strip_tags(fragment: str) -> str:
+    return " ".join(unescape(_TAG_RE.sub(" ", fragment)).split())
+
+def _parse_articles_fast(html: str, limit: int) -> List[Dict]:
+    """
+    Single linear regex scan over <article> blocks; no DOM is built.
+    The non-greedy regexes stop at the first closing tag, so nested <div>s in
+    tweetText (or nested <article>s) would truncate silently: in that case
+    return [] and let the caller fall back to the parser for the page.
+    """
+    out = []
+    for m in _ARTICLE_RE.finditer(html):
+        if len(out) >= limit:
+            break
+        body = m.group(1)
+        if "<article" in body:
+            return []
+        text_m = _TEXT_RE.search(body)
+        if text_m and "<div" in text_m.group(1):
+            return []
+        text = _strip_tags(text_m.group(1)) if text_m else _strip_tags(body)[:800]
+        id_m = _ID_RE.search(body)
+        out.append({"id": id_m.group(2) if id_m else None, "text": text})
+    return out
+
+def parse_articles_html(html: str, limit: int, fast: bool = True) -> List[Dict]:
+    """
+    Extract {"id", "text"} from the <article> nodes of a search/timeline page.
+    With fast=True a regex scan is tried first; the selectolax (lexbor) parser
+    is used when fast=False or when the regex finds nothing.
+    """
+    if fast:
+        out = _parse_articles_fast(html, limit)
+        if out:
+            return out
+    tree = LexborHTMLParser(html)
+    out = []
+    for art in tree.css("article")[:limit*2]:
+        if len(out) >= limit:
+            break
+        text_el = art.css_first(_TWEET_TEXT_SEL)
+        text = text_el.text(separator=" ", strip=True) if text_el else art.text(separator=" ", strip=True)[:800]
+        # href like /username/status/12345 (optionally followed by /photo/1 etc.)
+        a = art.css_first(_STATUS_LINK_SEL)
+        m = _STATUS_ID_RE.search(a.attributes.get("href") or "") if a else None
+        tweet_id = m.group(1) if m else None
+        out.append({"id": tweet_id, "text": text})
+    return out
+
+# ---------- TWIKIT NORMALIZATION ----------
+# output key -> candidate attribute names across Twikit/twscrape versions (first truthy wins)
+_TWEET_FIELDS = (
+    ("id", ("id",)),
+    ("text", ("text", "rawContent", "content")),
+    ("created_at", ("created_at", "createdAt")),
+    ("likes", ("likeCount", "likes")),
+    ("retweets", ("retweetCount",)),
+    ("replies", ("replyCount",)),
+    ("views", ("viewCount",)),
+    ("conversation_id", ("conversation_id", "conversationId")),
+)
+_USER_FIELDS = (
+    ("id", ("id",)),
+    ("username", ("username",)),
+    ("name", ("displayName", "name")),
+    ("followers", ("followersCount",)),
+    ("verified", ("verified",)),
+    ("profile_image", ("profile_image_url", "avatar")),
+)
+_field_plans: Dict[Tuple[type, int], tuple] = {}
+
+def _extract_fields(obj, fields: tuple) -> Dict:
+    """
+    Read `fields` from obj. The candidate names each class actually exposes are
+    probed once per (class, fields) and cached, so later objects skip the misses.
+    """
+    key = (type(obj), id(fields))  # fields are module constants; avoids re-hashing the nested tuple
+    plan = _field_plans.get(key)
+    if plan is None:
+        plan = tuple((out_key, tuple(n for n in names if hasattr(obj, n))) for out_key, names in fields)
+        _field_plans[key] = plan
+    out = {}
+    for out_key, names in plan:
+        v = None
+        for n in names:
+            v = getattr(obj, n, None)
+            if v:
+                break
+        out[out_key] = v
+    return out
+
 # ---------- SCRAPER ----------
 class SafeScraper:
     def __init__(self, pool: AccountPool, qps: float = GLOBAL_QPS):
         self.pool = pool
         self.rate = GlobalRateLimiter(qps)
-        self.http = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        # lowercased username -> (cached_at, numeric id or None), LRU ordered
+        self._uid_cache: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # resolved per request: one client per running loop, recreated after close_http_client()
+        return get_http_client()
 
     async def _acquire(self, acc: Account):
         await acc.sem.acquire()
@@ -188,44 +428,53 @@ class SafeScraper:
         except Exception:
             pass
 
+    async def _get(self, url: str, max_articles: Optional[int] = None, **kwargs) -> Tuple[httpx.Response, str]:
+        """
+        Streamed GET. Returns (response, html) where html stops early once
+        `max_articles` <article> tags have been seen or MAX_HTML_BYTES
+        characters have been read. html is "" for non-200 responses.
+        """
+        async with _host_semaphore():
+            async with self.http.stream("GET", url, **kwargs) as r:
+                if r.status_code != 200:
+                    return r, ""
+                buf = io.StringIO()
+                size = seen = 0
+                tail = ""
+                async for chunk in r.aiter_text():
+                    buf.write(chunk)
+                    size += len(chunk)
+                    if max_articles is not None:
+                        # carry 7 chars so a tag split across chunks is counted exactly once
+                        seen += (tail + chunk).count("<article")
+                        tail = chunk[-7:]
+                        if seen >= max_articles:
+                            break
+                    if size >= MAX_HTML_BYTES:
+                        break
+                return r, buf.getvalue()
+
     # -------- SEARCH (HTML only) --------
     @retryable()
-    async def search(self, query: str, limit: int = 20) -> List[Dict]:
+    async def search(self, query: str, limit: int = 20, fast: bool = True) -> List[Dict]:
         await self.rate.wait()
         acc = await self.pool.get_account()
         await self._acquire(acc)
         try:
             # Use web search (HTML) to avoid GQL / numeric ID constraints
-            url = f"https://x.com/search?q={_quote_q(query)}&src=typed_query"
-            headers = {"User-Agent": _choose_ua()}
-            r = await self.http.get(url, headers=headers, follow_redirects=True)
+            url = "https://x.com/search"
+            params = {"q": query, "src": "typed_query"}
+            headers = _ua_headers()
+            # one extra <article> guarantees the last wanted one is complete
+            r, html = await self._get(url, max_articles=limit*2 + 1, params=params, headers=headers, follow_redirects=True)
+            _raise_for_transient(r)
             if r.status_code != 200:
                 logger.warning(f"Search HTML returned {r.status_code} for query={query}")
                 return []
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # Very best-effort parsing: locate tweet containers
-            results = []
-            # try 'article' tags (modern layout)
-            articles = soup.find_all("article", limit=limit*2)
-            for art in articles:
-                if len(results) >= limit:
-                    break
-                text_el = art.find("div", attrs={"data-testid": "tweetText"})
-                text = text_el.get_text(" ", strip=True) if text_el else art.get_text(" ", strip=True)[:800]
-                # try to find link to tweet for id
-                a = art.find("a", href=True)
-                tweet_id = None
-                if a:
-                    href = a["href"]
-                    # href like /username/status/12345
-                    parts = href.split("/")
-                    if len(parts) >= 4 and parts[-2] == "status":
-                        tweet_id = parts[-1]
-                results.append({"id": tweet_id, "text": text, "scraped_with_query": query})
-            # final fallback: if no articles, return raw snippet
-            if not results:
-                return [{"id": None, "text": None, "raw_html": r.text[:1000], "scraped_with_query": query}]
+            # Very best-effort parsing: locate tweet containers ('article' tags, modern layout)
+            results = parse_articles_html(html, limit, fast=fast)
+            for item in results:
+                item["scraped_with_query"] = query
             return results[:limit]
         finally:
             await self._release(acc)
@@ -233,37 +482,62 @@ class SafeScraper:
     # -------- HELP: get numeric user id via twikit when possible --------
     async def _get_user_id(self, acc: Account, username: str) -> Optional[str]:
         """
-        Try Twikit's user_by_login or user_by_id methods to resolve numeric id.
-        Returns string id or None.
+        Cached wrapper around `_resolve_user_id`. Hits are kept for USER_ID_TTL,
+        conclusive misses (None) for the shorter USER_ID_NEG_TTL to avoid hammering
+        bad handles; lookups that failed on an error are not cached at all.
+        At most USER_ID_CACHE_SIZE handles are kept (least recently used evicted).
         """
+        key = username.lower()
+        hit = self._uid_cache.get(key)
+        if hit:
+            ts, uid = hit
+            if time.time() - ts < (USER_ID_TTL if uid else USER_ID_NEG_TTL):
+                self._uid_cache.move_to_end(key)
+                return uid
+        uid, conclusive = await self._resolve_user_id(acc, username)
+        if uid or conclusive:
+            self._uid_cache[key] = (time.time(), uid)
+            self._uid_cache.move_to_end(key)
+            if len(self._uid_cache) > USER_ID_CACHE_SIZE:
+                self._uid_cache.popitem(last=False)
+        return uid
+
+    async def _resolve_user_id(self, acc: Account, username: str) -> Tuple[Optional[str], bool]:
+        """
+        Try Twikit's user_by_login, then the profile page, to resolve the numeric id.
+        Returns (id or None, conclusive): conclusive is False when a step failed
+        (exception, timeout, non-200), so a None is not proof the handle is bad.
+        """
+        conclusive = True
         if acc.client:
             try:
                 # try user_by_login (awaitable)
                 u = await acc.client.user_by_login(username)
                 if u and getattr(u, "id", None):
-                    return str(getattr(u, "id"))
+                    return str(getattr(u, "id")), True
             except Exception as e:
+                conclusive = False
                 logger.debug(f"Twikit user_by_login failed for {username}: {e}")
         # last resort: try HTML (not robust)
         try:
             url = f"https://x.com/{username}"
-            headers = {"User-Agent": _choose_ua()}
-            r = await self.http.get(url, headers=headers)
+            headers = _ua_headers()
+            r, html = await self._get(url, headers=headers)
             if r.status_code == 200:
                 # try to parse numeric id in page (not guaranteed)
-                if "profile_user_id" in r.text:
-                    # crude
-                    import re
-                    m = re.search(r'profile_user_id["\']?\s*:\s*["\']?(\d+)', r.text)
-                    if m:
-                        return m.group(1)
-        except Exception:
-            pass
-        return None
+                m = _USER_ID_RE.search(html)
+                if m:
+                    return m.group(1), True
+            else:
+                conclusive = False
+        except Exception as e:
+            conclusive = False
+            logger.debug(f"Profile page lookup failed for {username}: {e}")
+        return None, conclusive
 
     # -------- USER TIMELINE (Twikit numeric user id preferred) --------
     @retryable()
-    async def user_timeline(self, username_or_id: str, limit: int = 20) -> List[Dict]:
+    async def user_timeline(self, username_or_id: str, limit: int = 20, fast: bool = True) -> List[Dict]:
         await self.rate.wait()
         acc = await self.pool.get_account()
         await self._acquire(acc)
@@ -290,84 +564,116 @@ class SafeScraper:
 
             # HTML fallback timeline
             url = f"https://x.com/{username_or_id}"
-            headers = {"User-Agent": _choose_ua()}
-            r = await self.http.get(url, headers=headers)
+            headers = _ua_headers()
+            r, html = await self._get(url, max_articles=limit*2 + 1, headers=headers)
+            _raise_for_transient(r)
             if r.status_code != 200:
                 logger.warning(f"Timeline HTML returned {r.status_code} for {username_or_id}")
                 return []
-            soup = BeautifulSoup(r.text, "html.parser")
-            articles = soup.find_all("article", limit=limit*2)
-            out = []
-            for art in articles:
-                if len(out) >= limit: break
-                text_el = art.find("div", attrs={"data-testid": "tweetText"})
-                text = text_el.get_text(" ", strip=True) if text_el else art.get_text(" ", strip=True)[:800]
-                # try to extract id from links
-                a = art.find("a", href=True)
-                tweet_id = None
-                if a:
-                    href = a["href"]
-                    parts = href.split("/")
-                    if len(parts) >= 4 and parts[-2] == "status":
-                        tweet_id = parts[-1]
-                out.append({"id": tweet_id, "text": text, "username": username_or_id})
+            out = parse_articles_html(html, limit, fast=fast)
+            for item in out:
+                item["username"] = username_or_id
             return out
         finally:
             await self._release(acc)
 
     # -------- TWEET DETAILS (GQL then HTML fallback) --------
     @retryable()
-    async def tweet_details(self, tweet_id: str) -> Dict:
+    async def tweet_details(self, tweet_id: str, include_raw: bool = False, enable_hedge: bool = False) -> Dict:
+        """
+        With enable_hedge=True the HTML fallback is started HEDGE_DELAY seconds
+        after the Twikit call instead of after it fails; the first good result wins.
+        """
         await self.rate.wait()
         acc = await self.pool.get_account()
         await self._acquire(acc)
         try:
+            if acc.client and enable_hedge:
+                return await self._hedged_details(acc, tweet_id, include_raw)
             if acc.client:
                 try:
-                    t = await acc.client.get_tweet_by_id(tweet_id)
-                    return self._normalize_tweet_from_twikit(t)
+                    return await self._twikit_details(acc, tweet_id)
                 except Exception as e:
                     logger.debug(f"Twikit get_tweet_by_id failed for {tweet_id}: {e}")
 
-            # HTML fallback
-            url = f"https://x.com/i/status/{tweet_id}"
-            headers = {"User-Agent": _choose_ua()}
-            r = await self.http.get(url, headers=headers, follow_redirects=True)
-            if r.status_code == 200:
-                parsed = parse_tweet_html(r.text)
-                parsed["id"] = tweet_id
-                parsed["scraped_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-                # minimal text extraction from HTML page if missing
-                if not parsed.get("text"):
-                    parsed["text"] = BeautifulSoup(r.text, "html.parser").get_text(" ", strip=True)[:1000]
-                return parsed
-            else:
-                return {"error": f"HTTP {r.status_code}", "id": tweet_id}
+            return await self._fetch_html_details(tweet_id, include_raw)
         finally:
             await self._release(acc)
 
+    async def _twikit_details(self, acc: Account, tweet_id: str) -> Dict:
+        t = await acc.client.get_tweet_by_id(tweet_id)
+        return self._normalize_tweet_from_twikit(t)
+
+    async def _fetch_html_details(self, tweet_id: str, include_raw: bool = False) -> Dict:
+        url = f"https://x.com/i/status/{tweet_id}"
+        headers = _ua_headers()
+        r, html = await self._get(url, headers=headers, follow_redirects=True)
+        _raise_for_transient(r)
+        if r.status_code == 200:
+            soup = BeautifulSoup(html, "lxml")
+            parsed = parse_tweet_html(html, include_raw=include_raw, soup=soup)
+            parsed["id"] = tweet_id
+            parsed["scraped_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            # minimal text extraction from HTML page if missing (same soup, no re-parse)
+            if not parsed.get("text"):
+                parsed["text"] = soup.get_text(" ", strip=True)[:1000]
+            return parsed
+        else:
+            return {"error": f"HTTP {r.status_code}", "id": tweet_id}
+
+    async def _delayed_html_details(self, tweet_id: str, include_raw: bool) -> Dict:
+        await asyncio.sleep(HEDGE_DELAY)
+        await self.rate.wait()  # the hedge is an extra request, keep it under the global budget
+        return await self._fetch_html_details(tweet_id, include_raw)
+
+    async def _hedged_details(self, acc: Account, tweet_id: str, include_raw: bool) -> Dict:
+        twikit_task = asyncio.create_task(self._twikit_details(acc, tweet_id))
+        html_task = asyncio.create_task(self._delayed_html_details(tweet_id, include_raw))
+        pending = {twikit_task, html_task}
+        fallback: Optional[Dict] = None
+        html_exc: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is not None:
+                        if task is html_task:
+                            html_exc = exc
+                        logger.debug(f"Hedged attempt failed for {tweet_id}: {exc}")
+                        continue
+                    res = task.result()
+                    if "error" not in res:
+                        return res
+                    fallback = res
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return fallback
+        # Twikit errors are swallowed like in the sequential path; HTML errors go to `retryable`
+        raise html_exc
+
+    # -------- BULK FAN-OUT --------
+    # Each item still passes the rate limiter and account semaphores; failures
+    # come back as exception objects in the corresponding slot.
+    async def search_many(self, queries: List[str], limit: int = 20) -> List[Any]:
+        return await asyncio.gather(*[self.search(q, limit=limit) for q in queries], return_exceptions=True)
+
+    async def user_timelines(self, usernames: List[str], limit: int = 20) -> List[Any]:
+        return await asyncio.gather(*[self.user_timeline(u, limit=limit) for u in usernames], return_exceptions=True)
+
+    async def tweet_details_many(self, ids: List[str]) -> List[Any]:
+        return await asyncio.gather(*[self.tweet_details(i) for i in ids], return_exceptions=True)
+
     # -------- normalizer for twikit objects ----------
     def _normalize_tweet_from_twikit(self, t, query: Optional[str] = None) -> Dict:
         out = {}
         try:
-            out["id"] = getattr(t, "id", None)
-            out["text"] = getattr(t, "text", None) or getattr(t, "rawContent", None) or getattr(t, "content", None)
-            out["created_at"] = getattr(t, "created_at", None) or getattr(t, "createdAt", None)
-            out["likes"] = getattr(t, "likeCount", None) or getattr(t, "likes", None)
-            out["retweets"] = getattr(t, "retweetCount", None)
-            out["replies"] = getattr(t, "replyCount", None)
-            out["views"] = getattr(t, "viewCount", None)
-            out["conversation_id"] = getattr(t, "conversation_id", None) or getattr(t, "conversationId", None)
+            out.update(_extract_fields(t, _TWEET_FIELDS))
             u = getattr(t, "user", None)
             if u:
-                out["user"] = {
-                    "id": getattr(u, "id", None),
-                    "username": getattr(u, "username", None),
-                    "name": getattr(u, "displayName", None) or getattr(u, "name", None),
-                    "followers": getattr(u, "followersCount", None),
-                    "verified": getattr(u, "verified", None),
-                    "profile_image": getattr(u, "profile_image_url", None) or getattr(u, "avatar", None),
-                }
+                out["user"] = _extract_fields(u, _USER_FIELDS)
             if query:
                 out["scraped_with_query"] = query
         except Exception:
@@ -404,5 +710,7 @@ async def demo_from_env():
     d = await scraper.tweet_details("1989415450447679764")
     print("---DETAILS---")
     print(d)
+    await close_http_client()
+    await pool.close()
 
 # End of file
@@ -8,7 +8,7 @@ It uses async/await and twscrape's GraphQL API for:
 - Better rate-limit handling
 - Multi-account rotation
 - Parallel scraping
-- Streaming tweet processing
+- Streaming tweet processing (stream_search / stream_user_timeline)
 
 IMPORTANT:
     - This DOES NOT RUN on Termux.
@@ -20,36 +20,103 @@ Usage (in Colab or main backend):
 from backend.scraper_twscrape import TwitterScraper
 scraper = TwitterScraper()
 data = await scraper.search("india", limit=200)
+payload = TwitterScraper.to_json(data)   # bytes; uses orjson when installed
+
+Outside async code, SyncTwitterScraper reuses one event loop across calls:
+scraper = SyncTwitterScraper()
+data = scraper.search("india", limit=200)
 
 """
 
 import asyncio
-from typing import List, Dict, Optional, Union
+import functools
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from datetime import date
+from operator import attrgetter
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger("scraper_twscrape")
+
+USER_CACHE_SIZE = 4096   # profiles kept by get_user
+USER_CACHE_TTL = 600     # seconds; bounds staleness of follower counts
+USER_CACHE_NEG_TTL = 60  # seconds a missing handle (None) stays cached
+# False: normalize_tweet keeps `date` as a datetime and encoders render it as ISO 8601.
+# True: `date` is an ISO string up front (for consumers that can't handle datetime).
+DATE_AS_STRING = False
+MAX_RETRIES = int(os.getenv("SG_RETRIES", "3"))  # same variable and default as scraper_pro
+RETRY_BACKOFF_CAP = 30.0
+# search/timeline result cache is opt-in: SG_CACHE_TTL=0 (default) keeps results live
+RESULT_CACHE_TTL = int(os.getenv("SG_CACHE_TTL", "0"))
+REDIS_URL = os.getenv("SG_REDIS_URL")  # e.g. redis://localhost:6379/0; unset = in-process cache
+
+# fast JSON encoders, preferred in this order: orjson, msgspec, stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+    _ENCODER = msgspec.json.Encoder()
+except ImportError:
+    msgspec = None
+    _ENCODER = None
+
+# optional shared result cache (enabled by SG_CACHE_TTL > 0; Redis when SG_REDIS_URL
+# is set, in-process otherwise)
+try:
+    from aiocache import Cache
+    from aiocache.serializers import PickleSerializer
+except ImportError:
+    Cache = None
 
+# uvloop (libuv-based loop) where available; Windows / missing install keeps asyncio's loop
 try:
-    from twscrape import API, gather
-except Exception:
-    API = None
-    gather = None
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    uvloop = None
 
 
 # ----------------------------------------------------------
 # NORMALIZATION UTILITIES
 # ----------------------------------------------------------
 
+# C-level multi-attribute getters (all fields exist on twscrape's Tweet/User dataclasses)
+_TWEET_GET = attrgetter("id", "date", "likeCount", "retweetCount", "replyCount",
+                        "viewCount", "sourceLabel", "rawContent", "user")
+_USER_NAMES_GET = attrgetter("username", "displayName")
+_intern = sys.intern
+
+
 def normalize_tweet(t) -> Dict:
     """Convert raw twscrape Tweet object into a clean dictionary."""
+    id_, created, likes, retweets, replies, views, source, raw, user = _TWEET_GET(t)
+    username, display_name = _USER_NAMES_GET(user) if user is not None else (None, None)
+    # Source labels are a small categorical set and handles repeat heavily across a
+    # scrape; interning shares one string object per value and speeds later dict lookups.
+    if type(source) is str:
+        source = _intern(source)
+    if type(username) is str:
+        username = _intern(username)
     return {
-        "id": t.id,
-        "date": str(t.date),
-        "username": getattr(t.user, "username", None),
-        "displayName": getattr(t.user, "displayName", None),
-        "content": getattr(t, "rawContent", "") or getattr(t, "content", ""),
-        "likes": getattr(t, "likeCount", None),
-        "retweets": getattr(t, "retweetCount", None),
-        "replies": getattr(t, "replyCount", None),
-        "views": getattr(t, "viewCount", None),
-        "source_label": getattr(t, "sourceLabel", None),
+        "id": id_,
+        "date": created.isoformat() if DATE_AS_STRING else created,
+        "username": username,
+        "displayName": display_name,
+        "content": raw or getattr(t, "content", ""),
+        "likes": likes,
+        "retweets": retweets,
+        "replies": replies,
+        "views": views,
+        "source_label": source,
     }
 
 
@@ -65,6 +132,82 @@ def normalize_user(u) -> Dict:
     }
 
 
+def normalize_tweets(tweets) -> List[Dict]:
+    """Batch-normalize an already materialized iterable of Tweets (map runs the loop in C)."""
+    return list(map(normalize_tweet, tweets))
+
+
+async def collect_tweets(raw_tweets: AsyncIterator) -> List[Dict]:
+    """Normalize a twscrape async iterator into a list in one pass (raw Tweets are dropped as we go)."""
+    out = []
+    append, norm = out.append, normalize_tweet  # local binds: no attr/global lookup per tweet
+    async for t in raw_tweets:
+        append(norm(t))
+    return out
+
+
+def _json_default(o):
+    if isinstance(o, date):  # also covers datetime
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def encode_tweets(tweets: List[Dict]) -> bytes:
+    """Encode normalized tweets/users to JSON bytes (orjson, else msgspec, else json)."""
+    if orjson is not None:
+        return orjson.dumps(tweets, option=orjson.OPT_NON_STR_KEYS)
+    if _ENCODER is not None:
+        return _ENCODER.encode(tweets)
+    return json.dumps(tweets, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def _make_result_cache():
+    if Cache is None or RESULT_CACHE_TTL <= 0:
+        return None
+    # Pickle for both backends: results hold normalized dicts only, so it's cheap, and
+    # every hit is a fresh copy -- callers mutating a result can't corrupt the cache.
+    if REDIS_URL:
+        try:
+            cache = Cache.from_url(REDIS_URL)
+        except Exception as e:  # e.g. InvalidCacheType when aiocache's redis extra is missing
+            logger.warning(f"result cache: SG_REDIS_URL unusable ({e!r}); falling back to in-process cache")
+        else:
+            cache.serializer = PickleSerializer()
+            return cache
+    return Cache(Cache.MEMORY, serializer=PickleSerializer())
+
+
+# ----------------------------------------------------------
+# RETRIES
+# ----------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _retryable_errors() -> tuple:
+    # httpx arrives with twscrape; resolved lazily to keep module import light
+    try:
+        import httpx
+    except ImportError:
+        return ()
+    return (httpx.HTTPStatusError, httpx.TransportError)
+
+
+def retryable(max_retries: int = MAX_RETRIES):
+    """Retry transient HTTP errors with capped exponential backoff and full jitter."""
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            errors = _retryable_errors()
+            for i in range(max_retries):
+                try:
+                    return await fn(*args, **kwargs)
+                except errors:
+                    if i + 1 >= max_retries:
+                        raise
+                    await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, 2 ** i)))
+        return wrapper
+    return deco
+
+
 # ----------------------------------------------------------
 # SCRAPER CLASS
 # ----------------------------------------------------------
@@ -77,45 +220,132 @@ class TwitterScraper:
     Example:
     --------
     scraper = TwitterScraper()
-    data = asyncio.run(scraper.search("india", limit=200))
+    data = TwitterScraper.run(scraper.search("india", limit=200))
     """
 
-    def __init__(self):
-        if API is None:
+    def __init__(self, max_concurrency: int = 16):
+        # imported lazily: twscrape pulls in httpx/sqlite/account manager, which
+        # slows cold start and isn't needed by callers that only read test_environment()
+        try:
+            from twscrape import API
+        except ImportError as e:
             raise RuntimeError(
                 "twscrape is not installed or cannot be imported. "
                 "This scraper must run in Colab or laptop, never Termux."
-            )
+            ) from e
 
         self.api = API()  # automatically loads stored accounts
+        # caps simultaneous searches in parallel_search so the cookie pool isn't thrashed
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._cache = _make_result_cache()
+        # (query, limit) -> running search task shared by concurrent callers
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        # lowercased username -> (fetched_at, normalized user or None), LRU ordered
+        self._user_cache: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()
+
+        # Prewarm the account pool in the background when constructed inside a
+        # running loop; otherwise callers can `await scraper.warmup()` (e.g. startup hook).
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._warmup_task = None
+        else:
+            self._warmup_task = loop.create_task(self.warmup())
+            # warmup is best-effort; mark its exception as retrieved
+            self._warmup_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def warmup(self):
+        """Load accounts/cookies from twscrape's SQLite store ahead of the first query."""
+        await self.api.pool.accounts_info()
+
+    @classmethod
+    def to_json(cls, data) -> bytes:
+        """Serialize results from any scraper method to JSON bytes (see encode_tweets)."""
+        return encode_tweets(data)
+
+    @staticmethod
+    def run(coro):
+        """Run a coroutine to completion on uvloop when installed (asyncio.run otherwise)."""
+        if uvloop is not None and hasattr(uvloop, "run"):
+            return uvloop.run(coro)
+        return asyncio.run(coro)
+
+    async def _cached(self, key: str, fetch) -> List[Dict]:
+        """Serve `key` from the result cache, else await fetch() and store it. Cache errors are ignored."""
+        if self._cache is None:
+            return await fetch()
+        try:
+            hit = await self._cache.get(key)
+            if hit is not None:
+                return hit
+        except Exception:
+            pass
+        result = await fetch()
+        try:
+            await self._cache.set(key, result, ttl=RESULT_CACHE_TTL)
+        except Exception:
+            pass
+        return result
 
     # ------------------------------------------------------
     # SEARCH SCRAPER
     # ------------------------------------------------------
+    async def stream_search(self, query: str, limit: int = 100) -> AsyncIterator[Dict]:
+        """Yield normalized tweets as twscrape pages them in (O(1) tweets held)."""
+        norm = normalize_tweet
+        async for t in self.api.search(query, limit=limit):
+            yield norm(t)
+
+    @retryable()
     async def search(self, query: str, limit: int = 100) -> List[Dict]:
-        """Search tweets asynchronously."""
-        tweets = await gather(self.api.search(query, limit=limit))
-        return [normalize_tweet(t) for t in tweets]
+        """Search tweets asynchronously (cached for SG_CACHE_TTL seconds when enabled and aiocache is installed)."""
+        return await self._cached(f"search:{query}:{limit}",
+                                  lambda: collect_tweets(self.api.search(query, limit=limit)))
 
     # ------------------------------------------------------
     # USER TIMELINE SCRAPER
     # ------------------------------------------------------
+    async def stream_user_timeline(self, username: str, limit: int = 200) -> AsyncIterator[Dict]:
+        """Yield normalized tweets from a user's timeline as they arrive."""
+        norm = normalize_tweet
+        async for t in self.api.user_tweets(username, limit=limit):
+            yield norm(t)
+
+    @retryable()
     async def user_timeline(self, username: str, limit: int = 200) -> List[Dict]:
-        """Scrape tweets from a user's timeline."""
-        tweets = await gather(self.api.user_tweets(username, limit=limit))
-        return [normalize_tweet(t) for t in tweets]
+        """Scrape tweets from a user's timeline (cached like search)."""
+        return await self._cached(f"timeline:{username.lower()}:{limit}",
+                                  lambda: collect_tweets(self.api.user_tweets(username, limit=limit)))
 
     # ------------------------------------------------------
     # USER INFO SCRAPER
     # ------------------------------------------------------
+    @retryable()
     async def get_user(self, username: str) -> Optional[Dict]:
-        """Fetch user profile."""
+        """
+        Fetch user profile (cached for USER_CACHE_TTL seconds, misses for
+        USER_CACHE_NEG_TTL, LRU-bounded). Each caller gets its own copy.
+        """
+        key = username.lower()
+        hit = self._user_cache.get(key)
+        if hit is not None:
+            ts, cached = hit
+            if time.monotonic() - ts < (USER_CACHE_TTL if cached else USER_CACHE_NEG_TTL):
+                self._user_cache.move_to_end(key)
+                return dict(cached) if cached else None
+
         user = await self.api.user_by_login(username)
-        return normalize_user(user) if user else None
+        result = normalize_user(user) if user else None
+        self._user_cache[key] = (time.monotonic(), dict(result) if result else None)
+        self._user_cache.move_to_end(key)
+        if len(self._user_cache) > USER_CACHE_SIZE:
+            self._user_cache.popitem(last=False)
+        return result
 
     # ------------------------------------------------------
     # TWEET DETAILS
     # ------------------------------------------------------
+    @retryable()
     async def tweet_details(self, tweet_id: Union[str, int]) -> Optional[Dict]:
         """Fetch full details about a tweet."""
         t = await self.api.tweet_details(int(tweet_id))
@@ -126,30 +356,136 @@ class TwitterScraper:
     # ------------------------------------------------------
     async def parallel_search(self, queries: List[str], limit: int = 50) -> Dict[str, List[Dict]]:
         """
-        Run multiple searches in parallel.
+        Run multiple searches in parallel (at most `max_concurrency` at a time).
+        Duplicate queries are searched once, and a query already in flight from
+        another call is awaited rather than re-issued. Queries that hit transient
+        HTTP errors after retries are logged and omitted; other errors propagate.
         Example:
             await scraper.parallel_search(["bjp", "congress"], limit=100)
 
         """
-        tasks = [self.api.search(q, limit=limit) for q in queries]
-        results = await gather(*tasks)
+        unique = list(dict.fromkeys(queries))
+        done = {q: tweets async for q, tweets in self.stream_parallel_search(unique, limit=limit)}
+        # completion order -> caller's query order
+        return {q: done[q] for q in unique if q in done}
+
+    async def stream_parallel_search(self, queries: List[str], limit: int = 50) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        Yield (query, tweets) as each search finishes, so fast queries are not
+        held back by slow ones. Same dedup/coalescing/concurrency rules as
+        parallel_search; queries that still fail with a transient
+        HTTP error after retries are logged and skipped.
+        """
+        search_one = self._search_one
+        errors = _retryable_errors()
+
+        async def tagged(q: str):
+            try:
+                return q, await search_one(q, limit)
+            except errors as e:  # transient failure that outlived the retries; anything else propagates
+                logger.warning(f"parallel_search: dropping {q!r} after retries: {e!r}")
+                return q, e
+
+        tasks = [asyncio.ensure_future(tagged(q)) for q in dict.fromkeys(queries)]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                q, result = await fut
+                if not isinstance(result, Exception):
+                    yield q, result
+        finally:
+            # consumer stopped early: drop our waiters (shared searches keep running)
+            for task in tasks:
+                task.cancel()
+
+    async def _search_one(self, query: str, limit: int) -> List[Dict]:
+        key = (query, limit)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_search(query, limit))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the shared search
+        return await asyncio.shield(task)
+
+    @retryable()
+    async def _run_search(self, query: str, limit: int) -> List[Dict]:
+        async def fetch() -> List[Dict]:
+            async with self._sem:
+                return await collect_tweets(self.api.search(query, limit=limit))
+        # same cache key as search(), so both entry points share results
+        return await self._cached(f"search:{query}:{limit}", fetch)
+
+
+# ----------------------------------------------------------
+# BLOCKING WRAPPER
+# ----------------------------------------------------------
+
+class SyncTwitterScraper:
+    """
+    Blocking facade over TwitterScraper that keeps ONE event loop alive across
+    calls, so twscrape's sessions and the scraper's caches survive between
+    queries instead of being rebuilt by asyncio.run() each time.
+    Do not use inside a running loop (Colab cells with await) -- use TwitterScraper.
 
-        return {
-            q: [normalize_tweet(t) for t in tweets]
-            for q, tweets in zip(queries, results)
-        }
+    Example:
+    --------
+    with SyncTwitterScraper() as scraper:
+        data = scraper.search("india", limit=200)
+    """
+
+    def __init__(self, **kwargs):
+        loop_factory = uvloop.new_event_loop if uvloop is not None else None
+        if hasattr(asyncio, "Runner"):  # Python 3.11+
+            self._runner = asyncio.Runner(loop_factory=loop_factory)
+            self._run = self._runner.run
+        else:
+            self._runner = (loop_factory or asyncio.new_event_loop)()
+            self._run = self._runner.run_until_complete
+        # build the scraper on the long-lived loop so anything loop-bound stays valid
+        self._scraper = self._run(self._make(kwargs))
+
+    @staticmethod
+    async def _make(kwargs) -> TwitterScraper:
+        return TwitterScraper(**kwargs)
+
+    def search(self, query: str, limit: int = 100) -> List[Dict]:
+        return self._run(self._scraper.search(query, limit=limit))
+
+    def user_timeline(self, username: str, limit: int = 200) -> List[Dict]:
+        return self._run(self._scraper.user_timeline(username, limit=limit))
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        return self._run(self._scraper.get_user(username))
+
+    def tweet_details(self, tweet_id: Union[str, int]) -> Optional[Dict]:
+        return self._run(self._scraper.tweet_details(tweet_id))
+
+    def parallel_search(self, queries: List[str], limit: int = 50) -> Dict[str, List[Dict]]:
+        return self._run(self._scraper.parallel_search(queries, limit=limit))
+
+    def close(self):
+        self._runner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 # ----------------------------------------------------------
 # TEST ENVIRONMENT CHECK (used by backend)
 # ----------------------------------------------------------
 
+_ENV = {
+    "twscrape_installed": importlib.util.find_spec("twscrape") is not None,
+    "async_ready": True,  # every TwitterScraper API method is a coroutine
+    "message": "Environment ready for async scraping on Colab/laptop."
+}
+
+
 def test_environment():
-    return {
-        "twscrape_installed": API is not None,
-        "async_ready": asyncio.iscoroutinefunction(TwitterScraper.search),
-        "message": "Environment ready for async scraping on Colab/laptop."
-    }
+    return dict(_ENV)
 
 
 # ----------------------------------------------------------